@@ -10,17 +10,39 @@ Date: March 2025
 
 Requirements:
     - requests
+    - numpy
+    - orjson
+    - aiohttp (optional, for the async API)
     - Google Maps API key
 
 Usage:
     python vrp_optimiser.py
 """
 
+import asyncio
+import atexit
+import dbm
 import os
+import pickle
+import shelve
+import threading
+import time
+import types
+import weakref
 import requests
 import logging
-from collections import defaultdict
-from typing import List, Dict, Optional
+import numpy as np
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optional; only the *_async methods need it
+    aiohttp = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,14 +51,205 @@ logger = logging.getLogger(__name__)
 # Replace with your own API key or set as environment variable
 API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY", "YOUR_API_KEY_HERE")
 
+# Google Maps API endpoints
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+
+# Display names for warehouse postcodes (read-only)
+WAREHOUSE_ALIAS = types.MappingProxyType({"LA1 1HH": "Sainsbury", "LA1 1UJ": "Aldi"})
+
+# Distance Matrix API limits per request
+MAX_MATRIX_ORIGINS = 25
+MAX_MATRIX_DESTINATIONS = 25
+MAX_MATRIX_ELEMENTS = 100
+
+# Number of API requests allowed in flight at once
+MAX_WORKERS = 16
+REQUEST_TIMEOUT = 10  # seconds
+
+# Optimised route: end address of each leg and the leg distances in meters
+Route = Tuple[List[str], np.ndarray]
+
+# Connection cap for the async API, kept within Google's QPS limits
+MAX_ASYNC_CONNECTIONS = 50
+
+# Retry policy shared by the sync and async paths
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 60  # seconds; longer Retry-After values are clamped
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Top-level response statuses that mean the request itself failed, as opposed
+# to e.g. ZERO_RESULTS where the lookup simply found no route
+API_ERROR_STATUSES = frozenset({
+    "INVALID_REQUEST",
+    "MAX_ELEMENTS_EXCEEDED",
+    "MAX_DIMENSIONS_EXCEEDED",
+    "MAX_WAYPOINTS_EXCEEDED",
+    "OVER_DAILY_LIMIT",
+    "OVER_QUERY_LIMIT",
+    "REQUEST_DENIED",
+    "UNKNOWN_ERROR",
+})
+
+# API responses are cached on disk so repeat runs don't pay for the same lookups.
+# Entries expire so that road network changes are eventually picked up.
+CACHE_PATH = ".gmaps_cache"
+CACHE_TTL = 30 * 24 * 60 * 60  # seconds
+
+
+class CappedRetry(Retry):
+    """
+    urllib3 Retry that never waits longer than MAX_RETRY_AFTER.
+    
+    Newer urllib3 versions allow up to six hours via Retry-After and older
+    ones have no limit, so the clamp is applied here rather than relying
+    on retry_after_max.
+    """
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+class ResponseCache:
+    """
+    Thread-safe cache of API results with a time-to-live.
+    
+    Entries are held in memory for the lifetime of the process. When a path
+    is given, unexpired entries are loaded from a shelve database at start-up
+    and new ones are written back in batches by flush(), so lookups never
+    touch the disk. If the database can't be read or written the cache keeps
+    working in memory only; unreadable entries are skipped.
+    
+    Caches that are still alive at interpreter exit are flushed then, so
+    one-off calls outside the batch methods are persisted too.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, ttl: float = CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+        if path is not None:
+            self._load()
+            _persistent_caches.add(self)
+
+    def _load(self) -> None:
+        """Read all unexpired entries from disk into memory."""
+        now = time.time()
+        skipped = 0
+        try:
+            with shelve.open(self.path) as db:
+                for db_key in list(db.keys()):
+                    # Entries written by another version of this module may not
+                    # unpickle or may have a different shape; drop just those
+                    try:
+                        entry = db[db_key]
+                        fresh = now - entry["ts"] <= self.ttl
+                    except (pickle.UnpicklingError, EOFError, AttributeError,
+                            ImportError, KeyError, TypeError, ValueError):
+                        skipped += 1
+                        continue
+                    if fresh:
+                        self._memory[db_key] = entry
+        except dbm.error as e:
+            logger.warning(f"Could not read response cache {self.path}, using memory only: {e}")
+            self.path = None
+            return
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable entries in response cache {self.path}")
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Tuple identifying the request, e.g. ("distance", origin, destination, mode)
+            
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._memory.get(repr(key))
+
+        if entry is None or time.time() - entry["ts"] > self.ttl:
+            return None
+        return entry["value"]
+
+    def set(self, key: Tuple[str, ...], value: Any) -> None:
+        """
+        Store a value in memory; it is persisted on the next flush().
+        
+        Args:
+            key: Tuple identifying the request
+            value: Parsed result to cache (must be picklable)
+        """
+        db_key = repr(key)
+        with self._lock:
+            self._memory[db_key] = {"value": value, "ts": time.time()}
+            if self.path is not None:
+                self._dirty.add(db_key)
+
+    def flush(self) -> None:
+        """Write entries added since the last flush to disk in one go."""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            pending = {db_key: self._memory[db_key] for db_key in self._dirty}
+            self._dirty.clear()
+
+        try:
+            with shelve.open(self.path) as db:
+                db.update(pending)
+        except (*dbm.error, pickle.PicklingError) as e:
+            logger.warning(f"Could not write response cache {self.path}: {e}")
+
+
+# Caches with a disk path, held weakly so discarded optimisers can be freed
+_persistent_caches: "weakref.WeakSet[ResponseCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_persistent_caches() -> None:
+    """Write pending entries of every live cache before the interpreter exits."""
+    for cache in list(_persistent_caches):
+        cache.flush()
+
 
 class RouteOptimiser:
     """
     Handles distance calculations and route optimisation using Google Maps API.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str = API_KEY, cache_path: Optional[str] = CACHE_PATH):
         self.api_key = api_key
+        # A cache_path of None keeps the cache in memory only
+        self.cache = ResponseCache(cache_path)
+
+        # Reuse connections across requests and retry transient failures.
+        # Rate-limited (429) responses wait for Retry-After (capped at
+        # MAX_RETRY_AFTER) and raise once retries are exhausted, so their
+        # bodies are never parsed.
+        # Query strings are built by requests from params dicts, which also
+        # URL-encodes postcodes (e.g. the space in "LA1 1UJ").
+        retry = CappedRetry(
+            total=MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET",)
+        )
+        adapter = HTTPAdapter(
+            pool_connections=MAX_WORKERS,
+            pool_maxsize=MAX_WORKERS,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
 
     def get_distance(self, origin: str, destination: str) -> Optional[int]:
         """
@@ -49,26 +262,100 @@ class RouteOptimiser:
         Returns:
             Distance in meters, or None if request fails
         """
-        url = (
-            f"https://maps.googleapis.com/maps/api/distancematrix/json"
-            f"?origins={origin}&destinations={destination}&mode=driving&key={self.api_key}"
-        )
+        return self.get_distance_matrix([origin], [destination])[origin].get(destination)
+
+    def get_distance_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Get driving distances between every origin and destination in one request.
+        
+        Args:
+            origins: Starting locations (at most MAX_MATRIX_ORIGINS)
+            destinations: End locations (at most MAX_MATRIX_DESTINATIONS)
+            
+        Returns:
+            Nested dict: origin -> destination -> distance in meters.
+            Pairs without a valid route are omitted.
+        """
+        distances, origins, destinations = self._cached_matrix(origins, destinations)
+        if not origins:
+            return distances
         
         try:
-            response = requests.get(url)
+            response = self.session.get(
+                DISTANCE_MATRIX_URL,
+                params=self._matrix_params(origins, destinations),
+                timeout=REQUEST_TIMEOUT
+            )
             response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] == "OK" and data["rows"]:
-                element = data["rows"][0]["elements"][0]
-                if element["status"] == "OK" and "distance" in element:
-                    return element["distance"]["value"]
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error retrieving distance from {origin} to {destination}: {e}")
+            data = orjson.loads(response.content)
+            self._read_matrix(data, origins, destinations, distances)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.error(f"Error retrieving distance matrix: {e}")
+        
+        return distances
+
+    def _cached_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str]
+    ) -> Tuple[Dict[str, Dict[str, int]], List[str], List[str]]:
+        """
+        Fill in cached distances and work out what still has to be requested.
         
-        return None
+        Returns:
+            Tuple of (nested distances dict, origins to request, destinations
+            to request). Only rows and columns containing uncached pairs are
+            kept, so both lists are empty when everything was cached.
+        """
+        distances = {origin: {} for origin in origins}
+        missing = set()
+
+        for origin in origins:
+            for destination in destinations:
+                cached = self.cache.get(("distance", origin, destination, "driving"))
+                if cached is None:
+                    missing.add((origin, destination))
+                else:
+                    distances[origin][destination] = cached
+
+        origins = [o for o in origins if any((o, d) in missing for d in destinations)]
+        destinations = [d for d in destinations if any((o, d) in missing for o in origins)]
+        return distances, origins, destinations
+
+    def _matrix_params(self, origins: List[str], destinations: List[str]) -> Dict[str, str]:
+        """Build the Distance Matrix query parameters."""
+        return {
+            "origins": "|".join(origins),
+            "destinations": "|".join(destinations),
+            "mode": "driving",
+            "key": self.api_key,
+        }
+
+    def _read_matrix(
+        self,
+        data: Dict[str, Any],
+        origins: List[str],
+        destinations: List[str],
+        distances: Dict[str, Dict[str, int]]
+    ) -> None:
+        """Copy valid distances from a Distance Matrix response into distances and the cache."""
+        if data["status"] != "OK":
+            _log_api_error("distance matrix", data)
+            return
+
+        # Rows follow the order of origins, elements the order of destinations
+        for origin, row in zip(origins, data["rows"]):
+            for destination, element in zip(destinations, row["elements"]):
+                if element["status"] == "OK" and "distance" in element:
+                    distance = element["distance"]["value"]
+                    distances[origin][destination] = distance
+                    self.cache.set(("distance", origin, destination, "driving"), distance)
 
-    def get_optimised_route(self, waypoints: List[str]) -> List[Dict[str, str]]:
+    def get_optimised_route(self, waypoints: List[str]) -> Route:
         """
         Get optimised route through multiple waypoints.
         
@@ -76,38 +363,57 @@ class RouteOptimiser:
             waypoints: List of locations to visit (first and last are start/end)
             
         Returns:
-            List of route legs with addresses and distances
+            Tuple of (end address of each leg, array of leg distances in meters)
         """
         if not waypoints:
-            return []
+            return _empty_route()
 
-        origin = waypoints[0]
-        destination = waypoints[-1]
-        stops = waypoints[1:-1]
-        waypoints_str = "|".join(stops)
-        
-        url = (
-            f"https://maps.googleapis.com/maps/api/directions/json?"
-            f"origin={origin}&destination={destination}&waypoints=optimize:true|{waypoints_str}&key={self.api_key}"
-        )
+        cache_key = ("directions",) + tuple(waypoints)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            response = requests.get(url)
+            response = self.session.get(
+                DIRECTIONS_URL,
+                params=self._route_params(waypoints),
+                timeout=REQUEST_TIMEOUT
+            )
             response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] == "OK":
-                route_info = []
-                for leg in data["routes"][0]["legs"]:
-                    route_info.append({
-                        "end_address": leg["end_address"],
-                        "distance": leg["distance"]["value"]
-                    })
-                return route_info
-        except requests.exceptions.RequestException as e:
+            data = orjson.loads(response.content)
+            return self._read_route(data, cache_key)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Error retrieving optimised route: {e}")
         
-        return []
+        return _empty_route()
+
+    def _route_params(self, waypoints: List[str]) -> Dict[str, str]:
+        """Build the Directions query parameters for a start/end plus optimised stops."""
+        return {
+            "origin": waypoints[0],
+            "destination": waypoints[-1],
+            "waypoints": "|".join(["optimize:true"] + waypoints[1:-1]),
+            "key": self.api_key,
+        }
+
+    def _read_route(
+        self,
+        data: Dict[str, Any],
+        cache_key: Tuple[str, ...]
+    ) -> Route:
+        """Extract the legs of a Directions response, caching them on success."""
+        if data["status"] != "OK":
+            _log_api_error("optimised route", data)
+            return _empty_route()
+
+        legs = data["routes"][0]["legs"]
+        addresses = [leg["end_address"] for leg in legs]
+        distances = np.fromiter(
+            (leg["distance"]["value"] for leg in legs), dtype=np.float64, count=len(legs)
+        )
+        route = (addresses, distances)
+        self.cache.set(cache_key, route)
+        return route
 
     def calculate_warehouse_distances(
         self, 
@@ -125,13 +431,16 @@ class RouteOptimiser:
             Nested dict: warehouse -> postcode -> distance
         """
         warehouse_distances = {warehouse: {} for warehouse in warehouses}
+        tiles = _matrix_tiles(warehouses, postcodes)
 
-        for warehouse in warehouses:
-            for postcode in postcodes:
-                distance = self.get_distance(warehouse, postcode)
-                if distance is not None:
-                    warehouse_distances[warehouse][postcode] = distance
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(lambda tile: self.get_distance_matrix(*tile), tiles)
 
+            for result in results:
+                for warehouse, distances in result.items():
+                    warehouse_distances[warehouse].update(distances)
+
+        self.cache.flush()
         return warehouse_distances
 
     def assign_postcodes_to_warehouses(
@@ -149,33 +458,38 @@ class RouteOptimiser:
         Returns:
             Dict mapping warehouse -> list of assigned postcodes
         """
+        if not warehouses or not postcodes:
+            return {warehouse: [] for warehouse in warehouses}
+
         warehouse_distances = self.calculate_warehouse_distances(warehouses, postcodes)
-        warehouse_assignments = {warehouse: [] for warehouse in warehouses}
 
-        for postcode in postcodes:
-            min_distance = float('inf')
-            nearest_warehouse = None
+        # Rows are warehouses, columns are postcodes; missing distances never win
+        distance_matrix = np.array([
+            [warehouse_distances[warehouse].get(postcode, np.inf) for postcode in postcodes]
+            for warehouse in warehouses
+        ], dtype=np.float64).reshape(len(warehouses), len(postcodes))
 
-            for warehouse in warehouses:
-                if postcode in warehouse_distances[warehouse]:
-                    distance = warehouse_distances[warehouse][postcode]
-                    if distance < min_distance:
-                        min_distance = distance
-                        nearest_warehouse = warehouse
+        # Postcodes with no valid distance at all fall back to the first warehouse,
+        # which is where argmin lands for an all-inf column
+        nearest = np.argmin(distance_matrix, axis=0)
 
-            if nearest_warehouse:
-                warehouse_assignments[nearest_warehouse].append(postcode)
-            else:
-                # Fallback: assign to first warehouse if no valid distance found
-                warehouse_assignments[warehouses[0]].append(postcode)
+        unreachable = np.isinf(distance_matrix).all(axis=0)
+        if unreachable.any():
+            logger.warning(
+                f"No distance found for {int(unreachable.sum())} postcode(s); "
+                f"assigning them to {warehouses[0]}"
+            )
 
-        return warehouse_assignments
+        return {
+            warehouse: [postcodes[i] for i in np.flatnonzero(nearest == w)]
+            for w, warehouse in enumerate(warehouses)
+        }
 
     def optimise_routes_for_trucks(
         self, 
         trucks: Dict[int, List[str]], 
         warehouse: str
-    ) -> Dict[int, Dict[str, any]]:
+    ) -> Dict[int, Dict[str, Any]]:
         """
         Optimise routes for each truck assigned to a warehouse.
         
@@ -186,21 +500,242 @@ class RouteOptimiser:
         Returns:
             Dict with route info and total distance for each truck
         """
-        truck_routes = {}
+        active_trucks = {truck_id: stops for truck_id, stops in trucks.items() if stops}
+
+        # Routes are independent, so request them concurrently
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            routes = executor.map(
+                lambda stops: self.get_optimised_route([warehouse] + stops + [warehouse]),
+                active_trucks.values()
+            )
+            routes_by_truck = dict(zip(active_trucks, routes))
+
+        self.cache.flush()
+        return {
+            truck_id: _summarise_route(*route)
+            for truck_id, route in routes_by_truck.items()
+        }
+
+    async def _aget_json(
+        self,
+        session: "aiohttp.ClientSession",
+        url: str,
+        params: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """
+        GET a Maps API endpoint and parse the JSON body.
+        
+        aiohttp has no retry support, so this mirrors the sync session's
+        policy: responses with a status in RETRY_STATUSES are retried after
+        their Retry-After delay (or an exponential backoff), and their bodies
+        are never parsed.
+        
+        Raises:
+            aiohttp.ClientResponseError: If the request fails or retries run out
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            async with session.get(url, params=params) as response:
+                if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    response.raise_for_status()
+                    return orjson.loads(await response.read())
+
+                delay = _retry_after(response.headers.get("Retry-After"), attempt)
+
+            # Sleep after leaving the block so the connection goes back to the pool
+            logger.warning(
+                f"Maps API returned HTTP {response.status}, retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def _aget_distance_matrix(
+        self,
+        session: "aiohttp.ClientSession",
+        origins: List[str],
+        destinations: List[str]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Async counterpart of get_distance_matrix using a shared aiohttp session.
+        """
+        distances, origins, destinations = self._cached_matrix(origins, destinations)
+        if not origins:
+            return distances
+
+        try:
+            data = await self._aget_json(
+                session,
+                DISTANCE_MATRIX_URL,
+                self._matrix_params(origins, destinations)
+            )
+            self._read_matrix(data, origins, destinations, distances)
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            logger.error(f"Error retrieving distance matrix: {e}")
+
+        return distances
+
+    async def _aget_optimised_route(
+        self,
+        session: "aiohttp.ClientSession",
+        waypoints: List[str]
+    ) -> Route:
+        """
+        Async counterpart of get_optimised_route using a shared aiohttp session.
+        """
+        if not waypoints:
+            return _empty_route()
+
+        cache_key = ("directions",) + tuple(waypoints)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            data = await self._aget_json(
+                session,
+                DIRECTIONS_URL,
+                self._route_params(waypoints)
+            )
+            return self._read_route(data, cache_key)
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            logger.error(f"Error retrieving optimised route: {e}")
+
+        return _empty_route()
+
+    def _async_session(self) -> "aiohttp.ClientSession":
+        """Open an aiohttp session capped at MAX_ASYNC_CONNECTIONS connections."""
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async RouteOptimiser API")
+
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_ASYNC_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+
+    async def calculate_warehouse_distances_async(
+        self,
+        warehouses: List[str],
+        postcodes: List[str]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Calculate distances from each warehouse to each postcode on an event loop.
+        
+        All Distance Matrix tiles are requested concurrently over one aiohttp
+        session. Use asyncio.run() to call this from synchronous code.
         
-        for truck_id, stops in trucks.items():
-            if not stops:
-                continue
-                
-            route_info = self.get_optimised_route([warehouse] + stops + [warehouse])
-            total_distance = sum([leg["distance"] for leg in route_info]) if route_info else 0
+        Args:
+            warehouses: List of warehouse postcodes
+            postcodes: List of delivery postcodes
             
-            truck_routes[truck_id] = {
-                "route": [leg["end_address"] for leg in route_info],
-                "total_distance": total_distance / 1000  # Convert to kilometers
-            }
+        Returns:
+            Nested dict: warehouse -> postcode -> distance
+        """
+        warehouse_distances = {warehouse: {} for warehouse in warehouses}
+
+        async with self._async_session() as session:
+            results = await asyncio.gather(*[
+                self._aget_distance_matrix(session, *tile)
+                for tile in _matrix_tiles(warehouses, postcodes)
+            ])
+
+        for result in results:
+            for warehouse, distances in result.items():
+                warehouse_distances[warehouse].update(distances)
+
+        await asyncio.to_thread(self.cache.flush)
+        return warehouse_distances
+
+    async def optimise_routes_for_trucks_async(
+        self,
+        trucks: Dict[int, List[str]],
+        warehouse: str
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Optimise routes for each truck on an event loop.
+        
+        All route requests are issued concurrently over one aiohttp session.
+        Use asyncio.run() to call this from synchronous code.
+        
+        Args:
+            trucks: Dict mapping truck_id -> list of postcodes
+            warehouse: Warehouse postcode (start and end point)
             
-        return truck_routes
+        Returns:
+            Dict with route info and total distance for each truck
+        """
+        active_trucks = {truck_id: stops for truck_id, stops in trucks.items() if stops}
+
+        async with self._async_session() as session:
+            routes = await asyncio.gather(*[
+                self._aget_optimised_route(session, [warehouse] + stops + [warehouse])
+                for stops in active_trucks.values()
+            ])
+
+        await asyncio.to_thread(self.cache.flush)
+        return {
+            truck_id: _summarise_route(*route)
+            for truck_id, route in zip(active_trucks, routes)
+        }
+
+
+def _matrix_tiles(
+    warehouses: List[str],
+    postcodes: List[str]
+) -> List[Tuple[List[str], List[str]]]:
+    """
+    Tile the warehouse x postcode matrix into blocks that fit within a single
+    Distance Matrix request.
+    
+    Returns:
+        List of (warehouse chunk, postcode chunk) pairs
+    """
+    if not postcodes:
+        return []
+
+    postcode_step = min(MAX_MATRIX_DESTINATIONS, len(postcodes))
+    warehouse_step = min(MAX_MATRIX_ORIGINS, MAX_MATRIX_ELEMENTS // postcode_step)
+
+    return [
+        (warehouses[i:i + warehouse_step], postcodes[j:j + postcode_step])
+        for i in range(0, len(warehouses), warehouse_step)
+        for j in range(0, len(postcodes), postcode_step)
+    ]
+
+
+def _retry_after(header: Optional[str], attempt: int) -> float:
+    """
+    Seconds to wait before retrying a failed request.
+    
+    Uses the Retry-After header when it is given in seconds, otherwise
+    falls back to exponential backoff. Either way the wait is capped at
+    MAX_RETRY_AFTER.
+    """
+    try:
+        delay = max(0.0, float(header))
+    except (TypeError, ValueError):
+        delay = 0.5 * 2 ** attempt
+    return min(delay, MAX_RETRY_AFTER)
+
+
+def _log_api_error(request_name: str, data: Dict[str, Any]) -> None:
+    """Log a Maps API response whose top-level status marks a failed request."""
+    status = data["status"]
+    if status in API_ERROR_STATUSES:
+        logger.error(
+            f"Maps API rejected {request_name} request with {status}: "
+            f"{data.get('error_message', 'no details')}"
+        )
+
+
+def _empty_route() -> Route:
+    """Route returned when the Directions request fails."""
+    return [], np.empty(0, dtype=np.float64)
+
+
+def _summarise_route(addresses: List[str], distances: np.ndarray) -> Dict[str, Any]:
+    """Reduce a route to its stop addresses and total distance in km."""
+    return {
+        "route": addresses,
+        "total_distance": float(distances.sum()) / 1000  # Convert to kilometers
+    }
 
 
 def divide_postcodes_among_trucks(
@@ -210,6 +745,10 @@ def divide_postcodes_among_trucks(
     """
     Evenly distribute postcodes among available trucks.
     
+    Postcodes are ordered by sector (e.g. "LA1 5") and split into
+    contiguous chunks, so each truck serves neighbouring streets rather
+    than stops scattered across the area.
+    
     Args:
         postcodes: List of postcodes to distribute
         num_trucks: Number of trucks available
@@ -217,10 +756,13 @@ def divide_postcodes_among_trucks(
     Returns:
         Dict mapping truck_id -> list of assigned postcodes
     """
-    trucks = defaultdict(list)
-    for i, pc in enumerate(postcodes):
-        trucks[i % num_trucks].append(pc)
-    return trucks
+    if not postcodes:
+        return {}
+
+    # Dropping the final two letters (the unit) leaves the postcode sector
+    ordered = sorted(postcodes, key=lambda pc: pc[:-2])
+    chunks = np.array_split(np.array(ordered, dtype=object), num_trucks)
+    return {truck_id: list(chunk) for truck_id, chunk in enumerate(chunks) if len(chunk)}
 
 
 def main():
@@ -229,7 +771,6 @@ def main():
     """
     # Warehouse locations (LA1 postcodes)
     warehouses = ["LA1 1UJ", "LA1 1HH"]  # Aldi, Sainsbury's
-    warehouse_alias = {"LA1 1HH": "Sainsbury", "LA1 1UJ": "Aldi"}
 
     # Sample postcodes for demonstration (expand for full implementation)
     postcodes = [
@@ -270,7 +811,7 @@ def main():
     global_truck_id = 0
 
     for warehouse in warehouses:
-        warehouse_label = warehouse_alias.get(warehouse, warehouse)
+        warehouse_label = WAREHOUSE_ALIAS.get(warehouse, warehouse)
         assigned_postcodes = warehouse_assignments[warehouse]
         num_trucks = trucks_per_warehouse[warehouse]
 